@@ -6,10 +6,6 @@ Just runs the Telegram bot without complex scheduling
 import os
 import sys
 import logging
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 # Add src to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -25,8 +21,9 @@ def main():
     """Main entry point for deployment"""
     logger.info("Starting Car Scout Bot for deployment...")
     
-    # Check required environment variables
-    if not os.getenv('TELEGRAM_BOT_TOKEN'):
+    # Check required configuration
+    from src.config import config
+    if not config.telegram_bot_token:
         logger.error("TELEGRAM_BOT_TOKEN environment variable is required")
         sys.exit(1)
     
@@ -3,31 +3,29 @@ Main application entry point for Car Scout
 Coordinates the bot, scraper, and alert system
 """
 
-import os
 import asyncio
 import logging
-# import schedule
-# import time
+from collections import defaultdict
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Use uvloop's libuv-based event loop when available (Linux deployments);
+# socket-heavy scrape + Telegram traffic benefits, and the default loop
+# remains the fallback everywhere else
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
-# Import our modules
+# Import our modules (src.config loads .env unless CARSCOUT_USE_DOTENV=0)
+from src.config import config
+from src.logging_setup import setup_queue_logging
 from src.bot.telegram_bot import CarScoutBot
 from src.scraper.kleinanzeigen_scraper import KleinanzeigenScraper
 from src.database.models import db_manager
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('car_scout.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging (queue-based; see src/logging_setup.py)
+setup_queue_logging()
 logger = logging.getLogger(__name__)
 
 class CarScoutApp:
@@ -41,149 +39,225 @@ class CarScoutApp:
         # Create database tables
         self.db.create_tables()
         logger.info("Database tables created/verified")
+
+        # In-memory cache of already-sent (alert_id, listing_id) pairs so the
+        # hot loop does a hash lookup instead of a DB query per listing
+        # Pairs are packed into single ints ((alert_id << 32) | listing_id):
+        # a set of small ints costs roughly a third of the equivalent tuple
+        # set, and unlike a Bloom filter the answer is exact — a false
+        # positive here would silently swallow a user's alert
+        self._sent_cache = {
+            (alert_id << 32) | listing_id
+            for alert_id, listing_id in self.db.get_all_sent_pairs()
+        }
+        logger.info("Loaded %d sent-listing pairs into cache", len(self._sent_cache))
+
+        # Alert payload dicts keyed by listing id, reset each cycle, so a
+        # listing matched by many users is converted once
+        self._alert_dict_cache = {}
     
     async def process_search_alerts(self):
         """Process all active search alerts and send notifications"""
         logger.info("Starting search alert processing...")
+        self._alert_dict_cache.clear()
         
-        # Get all active search alerts
-        search_alerts = self.db.get_active_search_alerts()
-        logger.info(f"Processing {len(search_alerts)} active search alerts")
+        # Get all active search alerts (blocking DB call off the event loop)
+        search_alerts = await asyncio.to_thread(self.db.get_active_search_alerts)
+        logger.info("Processing %d active search alerts", len(search_alerts))
         
+        # Users subscribing to identical filters produce identical search
+        # URLs; group them so each distinct URL is only scraped once per
+        # cycle. URLs are stored on the alert row, so the hot loop normally
+        # skips URL assembly entirely; rows created before the column
+        # existed are computed once here and backfilled.
+        groups = defaultdict(list)
+        backfill_urls = {}
         for alert in search_alerts:
+            search_url = alert.search_url
+            if not search_url:
+                search_url = self.scraper.build_search_url(
+                    brand=alert.brand,
+                    min_price=alert.min_price,
+                    max_price=alert.max_price,
+                    location=alert.location,
+                    radius=alert.radius,
+                    min_year=alert.min_year,
+                    max_mileage=alert.max_mileage
+                )
+                backfill_urls[alert.id] = search_url
+            groups[search_url].append(alert)
+
+        if backfill_urls:
+            await asyncio.to_thread(self.db.set_alert_search_urls, backfill_urls)
+
+        logger.info("Scraping %d distinct search URLs", len(groups))
+
+        # Scraping is network-bound, so process URL groups concurrently under
+        # a bounded semaphore instead of strictly one after another
+        semaphore = asyncio.Semaphore(10)
+        await asyncio.gather(
+            *(self._process_url_group(semaphore, url, alerts)
+              for url, alerts in groups.items())
+        )
+
+    async def _process_url_group(self, semaphore, search_url, alerts):
+        """Scrape one search URL and fan the results out to its alerts"""
+        async with semaphore:
+            # Scrape listings (only first page for alerts); the scraper is
+            # async, shares one HTTP/2 client across groups and paces all
+            # requests through its global delay gap
+            listings = await self.scraper.scrape_listings(search_url, 1)
+
+        # Upsert the whole scraped batch once per URL group instead of one
+        # row at a time per alert
+        listing_dicts = [
+            {
+                'external_id': listing.id,
+                'title': listing.title,
+                'price': listing.price,
+                'location': listing.location,
+                'date_posted': listing.date,
+                'description': listing.description,
+                'url': listing.url,
+                'image_url': listing.image_url,
+                'mileage': listing.mileage,
+                'year': listing.year,
+                'fuel_type': listing.fuel_type
+            }
+            for listing in listings
+        ]
+        # Only listings first seen within the last 2 hours come back; the
+        # freshness filter runs in SQL so stale rows never reach the loop
+        fresh_cutoff = datetime.utcnow() - timedelta(hours=2)
+        saved_rows = await asyncio.to_thread(
+            self.db.bulk_upsert_listings, listing_dicts, None, fresh_cutoff
+        )
+        saved_by_external_id = {row.external_id: row for row in saved_rows}
+        listing_pairs = [
+            (listing, saved_by_external_id[listing.id])
+            for listing in listings
+            if listing.id in saved_by_external_id
+        ]
+
+        for alert in alerts:
+            # Sessions are not safe to share across concurrent tasks, so each
+            # alert gets its own, still committed once per alert. All
+            # session I/O (commit/rollback/close included) runs in worker
+            # threads so the event loop keeps serving bot handlers.
+            session = await asyncio.to_thread(self.db.get_session)
             try:
-                await self.process_single_alert(alert)
-                
-                # Update last check time
-                session = self.db.get_session()
-                alert.last_check = datetime.utcnow()
-                session.commit()
-                session.close()
-                
-                # Small delay between processing alerts
-                await asyncio.sleep(2)
-                
+                await self.process_single_alert(alert, session, listing_pairs)
+
+                # Update last check time and commit in one thread hop
+                await asyncio.to_thread(
+                    self._finish_alert_check, alert.id, session
+                )
+
             except Exception as e:
-                logger.error(f"Error processing alert {alert.id}: {e}")
-    
-    async def process_single_alert(self, alert):
-        """Process a single search alert"""
-        logger.info(f"Processing alert {alert.id} for user {alert.user.telegram_id}")
-        
-        # Build search URL
-        search_url = self.scraper.build_search_url(
-            brand=alert.brand,
-            min_price=alert.min_price,
-            max_price=alert.max_price,
-            location=alert.location,
-            radius=alert.radius,
-            min_year=alert.min_year,
-            max_mileage=alert.max_mileage
-        )
-        
-        # Scrape listings (only first page for alerts)
-        listings = self.scraper.scrape_listings(search_url, max_pages=1)
-        
+                await asyncio.to_thread(session.rollback)
+                logger.error("Error processing alert %s: %s", alert.id, e)
+            finally:
+                await asyncio.to_thread(session.close)
+
+    def _finish_alert_check(self, alert_id, session):
+        """Stamp last_check and commit; runs in a worker thread"""
+        self.db.touch_last_check(alert_id, session=session)
+        session.commit()
+
+    async def process_single_alert(self, alert, session, listing_pairs):
+        """Process a single search alert against already-upserted listings"""
+        # Disabled users are filtered out in SQL already; this guards against
+        # a toggle flipping mid-cycle
+        if not alert.user.notifications_enabled:
+            return
+
+        logger.info("Processing alert %s for user %s", alert.id, alert.user.telegram_id)
+
+        # Freshness is already filtered in SQL by the upsert, so only the
+        # already-sent check remains here (a cache hit, no DB round-trip)
+        candidates = [
+            (listing, saved_listing)
+            for listing, saved_listing in listing_pairs
+            if ((alert.id << 32) | saved_listing.id) not in self._sent_cache
+        ]
+
+        # Confirm cache misses against the DB in one batched IN query; this
+        # covers rows written by other processes or lost cache state
+        if candidates:
+            already_sent = await asyncio.to_thread(
+                self.db.get_sent_listing_ids,
+                alert.id,
+                [saved.id for _, saved in candidates],
+            )
+            for _, saved in candidates:
+                if saved.id in already_sent:
+                    self._sent_cache.add((alert.id << 32) | saved.id)
+            to_send = [
+                pair for pair in candidates if pair[1].id not in already_sent
+            ]
+        else:
+            to_send = []
+
+        # Second pass: hand everything to the bot's alert queue, which
+        # coalesces bursts per user and enforces Telegram's 30 msg/s global
+        # and per-chat limits with retry handling — no pacing needed here
         new_listings_count = 0
-        
-        for listing in listings:
+        for listing, saved_listing in to_send:
             try:
-                # Save listing to database
-                listing_data = {
-                    'external_id': listing.id,
-                    'title': listing.title,
-                    'price': listing.price,
-                    'location': listing.location,
-                    'date_posted': listing.date,
-                    'description': listing.description,
-                    'url': listing.url,
-                    'image_url': listing.image_url,
-                    'mileage': listing.mileage,
-                    'year': listing.year,
-                    'fuel_type': listing.fuel_type
-                }
-                
-                saved_listing = self.db.save_car_listing(listing_data)
-                
-                # Check if we've already sent this listing to this user
-                if not self.db.has_been_sent(alert.id, saved_listing.id):
-                    # Check if listing is new (within last 2 hours)
-                    is_new_listing = (
-                        datetime.utcnow() - saved_listing.first_seen
-                    ) < timedelta(hours=2)
-                    
-                    if is_new_listing:
-                        # Send alert to user
-                        await self.send_listing_alert(alert.user, listing)
-                        
-                        # Mark as sent
-                        self.db.mark_listing_sent(alert.id, saved_listing.id)
-                        new_listings_count += 1
-                        
-                        logger.info(f"Sent alert for listing {listing.id} to user {alert.user.telegram_id}")
-                        
-                        # Small delay between notifications
-                        await asyncio.sleep(1)
-                
+                await self.send_listing_alert(alert.user, listing)
+
+                # Mark as sent (worker thread; sync SQLAlchemy)
+                await asyncio.to_thread(
+                    self.db.mark_listing_sent,
+                    alert.id,
+                    saved_listing.id,
+                    session=session,
+                )
+                self._sent_cache.add((alert.id << 32) | saved_listing.id)
+                new_listings_count += 1
+
+                logger.info("Queued alert for listing %s to user %s", listing.id, alert.user.telegram_id)
+
             except Exception as e:
-                logger.error(f"Error processing listing {listing.id}: {e}")
-        
-        logger.info(f"Sent {new_listings_count} new alerts for search {alert.id}")
+                logger.error("Error queueing listing %s: %s", listing.id, e)
+
+        logger.info("Sent %d new alerts for search %s", new_listings_count, alert.id)
     
     async def send_listing_alert(self, user, listing):
-        """Send a car listing alert to a user"""
+        """Queue a car listing alert through the bot's rate-limited queue
+
+        The queue coalesces bursts, caches rendered bodies, attaches the
+        listing photo and HTML-escapes the scraped fields, so this side
+        only converts the dataclass to the payload dict once per cycle.
+        """
         if not user.notifications_enabled:
             return
-        
-        try:
-            alert_text = f"""
-🚗 **New Car Match!**
 
-**{listing.title}**
-💰 **Price:** €{listing.price:,}
-📍 **Location:** {listing.location}
-📅 **Posted:** {listing.date}
+        alert_dict = self._alert_dict_cache.get(listing.id)
+        if alert_dict is None:
+            alert_dict = {
+                'title': listing.title,
+                'price': listing.price,
+                'location': listing.location,
+                'date': listing.date,
+                'description': listing.description or '',
+                'url': listing.url,
+                'image_url': listing.image_url,
+            }
+            self._alert_dict_cache[listing.id] = alert_dict
 
-"""
-            
-            if listing.year:
-                alert_text += f"📅 **Year:** {listing.year}\\n"
-            if listing.mileage:
-                alert_text += f"🛣️ **Mileage:** {listing.mileage}\\n"
-            if listing.fuel_type:
-                alert_text += f"⛽ **Fuel:** {listing.fuel_type}\\n"
-                
-            if listing.description:
-                # Truncate description to avoid message length limits
-                desc = listing.description[:300]
-                if len(listing.description) > 300:
-                    desc += "..."
-                alert_text += f"\\n📝 **Description:**\\n{desc}\\n"
-            
-            alert_text += f"\\n🔗 [View on Kleinanzeigen.de]({listing.url})"
-            
-            await self.bot.application.bot.send_message(
-                chat_id=user.telegram_id,
-                text=alert_text,
-                parse_mode='Markdown',
-                disable_web_page_preview=False
-            )
-            
-        except Exception as e:
-            logger.error(f"Failed to send alert to user {user.telegram_id}: {e}")
-    
-    # def run_scheduled_tasks(self):
-    #     """Run scheduled tasks in a separate thread"""
-    #     schedule.every(10).minutes.do(self.schedule_alert_processing)
-    #     
-    #     while True:
-    #         schedule.run_pending()
-    #         time.sleep(60)  # Check every minute
-    # 
-    # def schedule_alert_processing(self):
-    #     """Schedule alert processing to run in async context"""
-    #     asyncio.create_task(self.process_search_alerts())
+        await self.bot.send_car_alert(user.telegram_id, alert_dict)
     
+    async def _alert_loop(self):
+        """Run alert processing on a fixed interval using asyncio scheduling"""
+        while True:
+            try:
+                await self.process_search_alerts()
+                await asyncio.sleep(config.alert_interval)
+            except Exception as e:
+                logger.error("Error in alert loop: %s", e)
+                await asyncio.sleep(60)  # Wait 1 minute before retrying
+
     async def start_bot(self):
         """Start the Telegram bot"""
         logger.info("Starting Telegram bot...")
@@ -191,43 +265,45 @@ class CarScoutApp:
         # Start the bot
         await self.bot.application.initialize()
         await self.bot.application.start()
-        await self.bot.application.updater.start_polling()
-        
+        # Same long-poll tuning as CarScoutBot.run(): hold getUpdates open
+        # for 30 s, re-poll immediately, and skip update types without
+        # registered handlers
+        await self.bot.application.updater.start_polling(
+            timeout=30,
+            poll_interval=0.0,
+            allowed_updates=["message", "callback_query"],
+        )
+
+        # The manual lifecycle above skips PTB's post_init hook, which is
+        # what spawns the alert-queue workers and background jobs
+        await self.bot.post_init(self.bot.application)
+
         logger.info("Bot started successfully")
     
     async def run_async(self):
         """Run the application asynchronously"""
         # Start bot
         await self.start_bot()
-        
+
         # Run alert processing loop
-        while True:
-            try:
-                await self.process_search_alerts()
-                await asyncio.sleep(600)  # Wait 10 minutes
-            except Exception as e:
-                logger.error(f"Error in main loop: {e}")
-                await asyncio.sleep(60)  # Wait 1 minute before retrying
+        await self._alert_loop()
 
 def main():
     """Main entry point"""
     logger.info("Starting Car Scout application...")
     
-    # Verify required environment variables
-    required_vars = ['TELEGRAM_BOT_TOKEN']
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
-    
-    if missing_vars:
-        logger.error(f"Missing required environment variables: {missing_vars}")
+    # Verify required configuration
+    if not config.telegram_bot_token:
+        logger.error("Missing required environment variable: TELEGRAM_BOT_TOKEN")
         logger.error("Please check your .env file")
         return
-    
+
     # Create and run the application
     app = CarScoutApp()
-    
+
     try:
         # For development, just run the bot
-        if os.getenv('DEVELOPMENT', 'false').lower() == 'true':
+        if config.development:
             logger.info("Running in development mode (bot only)")
             app.bot.run()
         else:
@@ -238,7 +314,7 @@ def main():
     except KeyboardInterrupt:
         logger.info("Application stopped by user")
     except Exception as e:
-        logger.error(f"Application error: {e}")
+        logger.error("Application error: %s", e)
 
 if __name__ == "__main__":
     main()
@@ -5,22 +5,20 @@ Simple script to run just the Telegram bot for development/testing
 
 import os
 import sys
-from dotenv import load_dotenv
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-# Load environment variables
-load_dotenv()
-
+# src.config loads .env unless CARSCOUT_USE_DOTENV=0
+from src.config import config
 from src.bot.telegram_bot import CarScoutBot
 
 def main():
     """Run the bot"""
     print("🚗 Starting Car Scout Bot...")
     print("Press Ctrl+C to stop")
-    
-    if not os.getenv('TELEGRAM_BOT_TOKEN'):
+
+    if not config.telegram_bot_token:
         print("❌ TELEGRAM_BOT_TOKEN not found in .env file")
         print("Please add your bot token to the .env file")
         return
@@ -0,0 +1,54 @@
+"""
+Central configuration for Car Scout
+Environment variables are read once at import time into a frozen dataclass
+so the rest of the code uses attribute access instead of scattered
+os.getenv calls
+"""
+
+import os
+from dataclasses import dataclass
+
+# Load .env before reading the variables. Deployments where the
+# orchestrator injects the environment can set CARSCOUT_USE_DOTENV=0 to
+# skip the file read/parse entirely
+if os.getenv('CARSCOUT_USE_DOTENV', '1') != '0':
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Application configuration snapshot"""
+    telegram_bot_token: str
+    development: bool
+    alert_interval: int  # Seconds between alert processing cycles
+    database_url: str
+    # Webhook delivery (used when bot_mode == 'webhook')
+    bot_mode: str
+    webhook_url: str
+    webhook_listen: str
+    webhook_port: int
+    webhook_path: str  # empty string means "default to the bot token"
+    webhook_secret: str
+
+
+def _load() -> Config:
+    return Config(
+        telegram_bot_token=os.getenv('TELEGRAM_BOT_TOKEN', ''),
+        development=os.getenv('DEVELOPMENT', 'false').lower() == 'true',
+        alert_interval=int(os.getenv('ALERT_INTERVAL_SECONDS', '600')),
+        database_url=os.getenv('DATABASE_URL', 'sqlite:///./car_scout.db'),
+        bot_mode=os.getenv('BOT_MODE', 'polling'),
+        webhook_url=os.getenv('WEBHOOK_URL', '').rstrip('/'),
+        webhook_listen=os.getenv('WEBHOOK_LISTEN', '0.0.0.0'),
+        # Hosting platforms (Render, Heroku, ...) inject PORT;
+        # WEBHOOK_PORT still wins when both are set
+        webhook_port=int(
+            os.getenv('WEBHOOK_PORT') or os.getenv('PORT') or '8443'
+        ),
+        webhook_path=os.getenv('WEBHOOK_PATH', ''),
+        webhook_secret=os.getenv('WEBHOOK_SECRET', ''),
+    )
+
+
+config = _load()
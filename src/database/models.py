@@ -2,11 +2,13 @@
 Database models for Car Scout application
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import create_engine, event, inspect, select, case, func, Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, contains_eager
+from contextlib import contextmanager
 from datetime import datetime
 import os
+import threading
 
 Base = declarative_base()
 
@@ -35,7 +37,13 @@ class User(Base):
 class SearchAlert(Base):
     """Model for storing user's car search alerts"""
     __tablename__ = 'search_alerts'
-    
+
+    # Covers the hot "active alerts (due for a re-check)" filters so they
+    # stop scanning the whole table as alerts accumulate
+    __table_args__ = (
+        Index('ix_search_alerts_active_lastcheck', 'is_active', 'last_check'),
+    )
+
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     name = Column(String(200))  # User-friendly name for the search
@@ -47,6 +55,7 @@ class SearchAlert(Base):
     min_year = Column(Integer)
     max_mileage = Column(Integer)
     keywords = Column(Text)  # Additional keywords to search for
+    search_url = Column(String(500), index=True)  # Precomputed Kleinanzeigen URL
     is_active = Column(Boolean, default=True)
     last_check = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -88,7 +97,15 @@ class CarListing(Base):
 class SentListing(Base):
     """Track which listings have been sent to which users"""
     __tablename__ = 'sent_listings'
-    
+
+    # One row per (alert, listing) pair; the unique constraint doubles as
+    # the index behind the batched IN lookups and lets inserts use
+    # ON CONFLICT DO NOTHING instead of a read-before-write
+    __table_args__ = (
+        UniqueConstraint('search_alert_id', 'car_listing_id',
+                         name='uq_sent_alert_listing'),
+    )
+
     id = Column(Integer, primary_key=True)
     search_alert_id = Column(Integer, ForeignKey('search_alerts.id'), nullable=False)
     car_listing_id = Column(Integer, ForeignKey('car_listings.id'), nullable=False)
@@ -103,29 +120,136 @@ class SentListing(Base):
 
 class DatabaseManager:
     """Database connection and session management"""
-    
+
     def __init__(self, database_url: str = None):
         if database_url is None:
             database_url = os.getenv('DATABASE_URL', 'sqlite:///./car_scout.db')
-        
+
         self.engine = create_engine(database_url)
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
-        
+        if self.engine.dialect.name == 'sqlite':
+            # WAL lets readers run alongside the scraper's writes and
+            # amortizes fsyncs; synchronous=NORMAL is safe under WAL and
+            # drops the per-commit fsync that dominates sustained inserts.
+            # Applied per connection since PRAGMAs don't persist in the file.
+            @event.listens_for(self.engine, "connect")
+            def _set_sqlite_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+                cursor.execute("PRAGMA temp_store=MEMORY")
+                cursor.execute("PRAGMA mmap_size=268435456")
+                cursor.execute("PRAGMA cache_size=-65536")
+                cursor.close()
+
+        # expire_on_commit=False keeps returned ORM objects readable after
+        # their session commits and closes, so helpers can hand rows back
+        # without an extra refresh round-trip
+        self.SessionLocal = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            bind=self.engine,
+        )
+
+        # telegram_id -> users.id map so hot paths that only need the
+        # primary key skip the per-update SELECT; primary keys never
+        # change, so entries can live until the map is recycled. Guarded
+        # by a lock because resolution happens in worker threads.
+        self._user_id_cache = {}
+        self._user_id_lock = threading.Lock()
+
     def create_tables(self):
-        """Create all tables"""
+        """Create all tables and retrofit schema changes onto old databases"""
         Base.metadata.create_all(bind=self.engine)
-        
+        self._upgrade_schema()
+
+    def _upgrade_schema(self):
+        """Bring a database created by an older build up to this schema
+
+        create_all only creates missing tables — it never alters existing
+        ones, so columns and indexes added since a deployment's database
+        was first created have to be retrofitted here. Every step is
+        guarded so it is a no-op on fresh or already-upgraded databases.
+        """
+        inspector = inspect(self.engine)
+        alert_columns = {
+            col['name'] for col in inspector.get_columns('search_alerts')
+        }
+
+        pair = {'search_alert_id', 'car_listing_id'}
+        has_unique_pair = any(
+            set(uc['column_names']) == pair
+            for uc in inspector.get_unique_constraints('sent_listings')
+        ) or any(
+            ix['unique'] and set(ix['column_names']) == pair
+            for ix in inspector.get_indexes('sent_listings')
+        )
+
+        with self.engine.begin() as conn:
+            if 'search_url' not in alert_columns:
+                conn.exec_driver_sql(
+                    "ALTER TABLE search_alerts ADD COLUMN search_url VARCHAR(500)"
+                )
+                conn.exec_driver_sql(
+                    "CREATE INDEX IF NOT EXISTS ix_search_alerts_search_url "
+                    "ON search_alerts (search_url)"
+                )
+
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_search_alerts_active_lastcheck "
+                "ON search_alerts (is_active, last_check)"
+            )
+
+            if not has_unique_pair:
+                # Old builds could insert the same pair twice; clear the
+                # duplicates or the unique index cannot be built (and the
+                # ON CONFLICT upsert in mark_listing_sent needs the index)
+                conn.exec_driver_sql(
+                    "DELETE FROM sent_listings WHERE id NOT IN ("
+                    "SELECT MIN(id) FROM sent_listings "
+                    "GROUP BY search_alert_id, car_listing_id)"
+                )
+                conn.exec_driver_sql(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS uq_sent_alert_listing "
+                    "ON sent_listings (search_alert_id, car_listing_id)"
+                )
+
     def get_session(self):
         """Get database session"""
         return self.SessionLocal()
-        
-    def get_or_create_user(self, telegram_id: int, username: str = None, 
+
+    @contextmanager
+    def session_scope(self, session=None):
+        """Yield a session, owning its lifecycle only if none was passed
+
+        A borrowed session is flushed but left for the caller to commit,
+        so several helper calls can share one transaction; an owned
+        session is committed (or rolled back on error) and closed here.
+        Replaces the owns_session bookkeeping every helper used to repeat.
+        """
+        owns_session = session is None
+        if owns_session:
+            session = self.SessionLocal()
+        try:
+            yield session
+            if owns_session:
+                session.commit()
+            else:
+                session.flush()
+        except Exception:
+            if owns_session:
+                session.rollback()
+            raise
+        finally:
+            if owns_session:
+                session.close()
+
+    def get_or_create_user(self, telegram_id: int, username: str = None,
                           first_name: str = None, last_name: str = None) -> User:
         """Get existing user or create new one"""
-        session = self.get_session()
-        try:
+        with self.session_scope() as session:
             user = session.query(User).filter(User.telegram_id == telegram_id).first()
-            
+
             if not user:
                 user = User(
                     telegram_id=telegram_id,
@@ -134,80 +258,266 @@ class DatabaseManager:
                     last_name=last_name
                 )
                 session.add(user)
-                session.commit()
-                session.refresh(user)
-            
+
             return user
-        finally:
-            session.close()
-    
+
+    def resolve_user_id(self, telegram_id: int, username: str = None,
+                        first_name: str = None, last_name: str = None) -> int:
+        """Resolve a Telegram id to the users.id primary key
+
+        Served from the in-process map after first contact; a miss falls
+        back to get_or_create_user and caches the result. Use this on
+        paths that only need the key, not the full profile row.
+        """
+        with self._user_id_lock:
+            user_id = self._user_id_cache.get(telegram_id)
+        if user_id is not None:
+            return user_id
+
+        user = self.get_or_create_user(telegram_id, username, first_name, last_name)
+        with self._user_id_lock:
+            if len(self._user_id_cache) >= 4096:
+                # ids are one cheap query to refill; a flush beats
+                # tracking per-entry recency
+                self._user_id_cache.clear()
+            self._user_id_cache[telegram_id] = user.id
+        return user.id
+
     def create_search_alert(self, user_id: int, **kwargs) -> SearchAlert:
         """Create new search alert"""
-        session = self.get_session()
-        try:
+        with self.session_scope() as session:
             search_alert = SearchAlert(user_id=user_id, **kwargs)
             session.add(search_alert)
-            session.commit()
-            session.refresh(search_alert)
             return search_alert
-        finally:
-            session.close()
-    
+
     def get_active_search_alerts(self) -> list:
-        """Get all active search alerts"""
-        session = self.get_session()
-        try:
-            return session.query(SearchAlert).filter(SearchAlert.is_active == True).all()
-        finally:
-            session.close()
-    
-    def save_car_listing(self, listing_data: dict) -> CarListing:
-        """Save or update car listing"""
-        session = self.get_session()
-        try:
-            existing = session.query(CarListing).filter(
-                CarListing.external_id == listing_data['external_id']
-            ).first()
-            
-            if existing:
-                # Update last_seen timestamp
-                existing.last_seen = datetime.utcnow()
-                session.commit()
-                return existing
+        """Get active search alerts for users with notifications enabled,
+        with the users eagerly loaded"""
+        with self.session_scope() as session:
+            # The users table is already joined for the notifications filter,
+            # so contains_eager populates alert.user from that same JOIN —
+            # one query total, no lazy SELECT per alert.user access (those
+            # lazy loads would fail anyway once the session is closed).
+            # Sent-listing membership is deliberately NOT eager-loaded here:
+            # the collections grow without bound, so callers use the batched
+            # get_sent_listing_ids IN query instead.
+            stmt = (
+                select(SearchAlert)
+                .join(User)
+                .options(contains_eager(SearchAlert.user))
+                .where(
+                    SearchAlert.is_active == True,
+                    User.notifications_enabled == True,
+                )
+            )
+            return session.scalars(stmt).all()
+
+    def get_alerts_due(self, before) -> list:
+        """Active alerts not checked since `before`, users eagerly loaded
+
+        Alerts that have never been checked count as due. Backed by the
+        (is_active, last_check) index, so the scan stays sub-linear as
+        the table grows.
+        """
+        with self.session_scope() as session:
+            stmt = (
+                select(SearchAlert)
+                .join(User)
+                .options(contains_eager(SearchAlert.user))
+                .where(
+                    SearchAlert.is_active == True,
+                    User.notifications_enabled == True,
+                    (SearchAlert.last_check == None) |
+                    (SearchAlert.last_check < before),
+                )
+            )
+            return session.scalars(stmt).all()
+
+    def save_car_listing(self, listing_data: dict, session=None) -> CarListing:
+        """Save or update a single car listing
+
+        Single-row convenience wrapper over bulk_upsert_listings: one
+        INSERT .. ON CONFLICT DO UPDATE instead of the old SELECT followed
+        by INSERT or UPDATE, so there is no read-modify-write race and half
+        the round-trips. When a session is passed in, work happens in that
+        session and the caller is responsible for committing.
+        """
+        rows = self.bulk_upsert_listings([listing_data], session=session)
+        return rows[0]
+
+    def bulk_upsert_listings(self, listing_dicts: list, session=None,
+                             fresh_since=None) -> list:
+        """Upsert a batch of scraped listings in one statement
+
+        New rows are inserted; rows whose external_id already exists get
+        their last_seen timestamp bumped. Returns the CarListing rows for
+        the given external_ids; when fresh_since is set, only rows first
+        seen after that cutoff come back, so stale listings are filtered
+        in SQL instead of Python.
+        """
+        if not listing_dicts:
+            return []
+
+        with self.session_scope(session) as s:
+            if self.engine.dialect.name == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
             else:
-                # Create new listing
-                listing = CarListing(**listing_data)
-                session.add(listing)
-                session.commit()
-                session.refresh(listing)
-                return listing
-        finally:
-            session.close()
-    
-    def mark_listing_sent(self, search_alert_id: int, car_listing_id: int):
-        """Mark that a listing has been sent to a user"""
-        session = self.get_session()
-        try:
-            sent_listing = SentListing(
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+            stmt = dialect_insert(CarListing).values(listing_dicts)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['external_id'],
+                set_={'last_seen': datetime.utcnow()},
+            )
+            s.execute(stmt)
+            s.flush()
+
+            external_ids = [d['external_id'] for d in listing_dicts]
+            query = s.query(CarListing).filter(
+                CarListing.external_id.in_(external_ids)
+            )
+            if fresh_since is not None:
+                query = query.filter(CarListing.first_seen >= fresh_since)
+            return query.all()
+
+    def mark_listing_sent(self, search_alert_id: int, car_listing_id: int, session=None):
+        """Mark that a listing has been sent to a user
+
+        Duplicate pairs (cache races, concurrent cycles) are dropped by
+        the unique constraint via ON CONFLICT DO NOTHING rather than
+        surfacing an IntegrityError.
+        """
+        with self.session_scope(session) as s:
+            if self.engine.dialect.name == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+            stmt = dialect_insert(SentListing).values(
                 search_alert_id=search_alert_id,
-                car_listing_id=car_listing_id
+                car_listing_id=car_listing_id,
+            ).on_conflict_do_nothing(
+                index_elements=['search_alert_id', 'car_listing_id']
             )
-            session.add(sent_listing)
-            session.commit()
-        finally:
-            session.close()
-    
-    def has_been_sent(self, search_alert_id: int, car_listing_id: int) -> bool:
-        """Check if listing has already been sent to user"""
-        session = self.get_session()
-        try:
-            sent = session.query(SentListing).filter(
+            s.execute(stmt)
+
+    def has_been_sent(self, search_alert_id: int, car_listing_id: int, session=None) -> bool:
+        """Check if listing has already been sent to user
+
+        Selects a bare column with LIMIT 1 instead of hydrating a
+        SentListing entity; the statement itself is compiled once and
+        reused via the engine's built-in compiled-statement cache.
+        """
+        with self.session_scope(session) as s:
+            stmt = select(SentListing.id).where(
                 SentListing.search_alert_id == search_alert_id,
-                SentListing.car_listing_id == car_listing_id
-            ).first()
-            return sent is not None
-        finally:
-            session.close()
+                SentListing.car_listing_id == car_listing_id,
+            ).limit(1)
+            return s.execute(stmt).first() is not None
+
+    def set_alert_search_urls(self, url_by_alert_id: dict):
+        """Backfill precomputed search URLs onto alert rows"""
+        if not url_by_alert_id:
+            return
+        with self.session_scope() as session:
+            for alert_id, search_url in url_by_alert_id.items():
+                session.query(SearchAlert).filter(
+                    SearchAlert.id == alert_id
+                ).update({SearchAlert.search_url: search_url})
+
+    def get_sent_listing_ids(self, search_alert_id: int, listing_ids: list,
+                             session=None) -> set:
+        """Get which of the given listings were already sent for an alert,
+        in a single IN query instead of one lookup per listing"""
+        if not listing_ids:
+            return set()
+        with self.session_scope(session) as s:
+            rows = s.query(SentListing.car_listing_id).filter(
+                SentListing.search_alert_id == search_alert_id,
+                SentListing.car_listing_id.in_(listing_ids)
+            ).all()
+            return {row[0] for row in rows}
+
+    def get_all_sent_pairs(self) -> set:
+        """Get all (search_alert_id, car_listing_id) pairs that were already sent
+
+        This is the largest read in the app (it warms the in-memory sent
+        cache at startup), so the rows stream through the cursor in
+        yield_per chunks instead of materializing a full result list
+        alongside the set being built.
+        """
+        with self.session_scope() as session:
+            result = session.execute(
+                select(
+                    SentListing.search_alert_id, SentListing.car_listing_id
+                ).execution_options(yield_per=1000)
+            )
+            return set(result)
+
+    def get_global_stats(self) -> dict:
+        """Bot-wide aggregate counts in one session
+
+        Cheap enough to run on a timer; callers serve clicks from the
+        cached result instead of issuing aggregates per view render.
+        """
+        with self.session_scope() as session:
+            return {
+                'users': session.query(func.count(User.id)).scalar(),
+                'active_alerts': session.query(func.count(SearchAlert.id))
+                .filter(SearchAlert.is_active == True).scalar(),
+                'listings': session.query(func.count(CarListing.id)).scalar(),
+                'alerts_sent': session.query(func.count(SentListing.id)).scalar(),
+            }
+
+    def disable_notifications(self, telegram_id: int):
+        """Turn off notifications for a user (e.g. after they block the bot)
+
+        Keeps future scrape/alert cycles from paying for sends that can
+        never be delivered; get_active_search_alerts already filters on
+        this flag.
+        """
+        with self.session_scope() as session:
+            session.query(User).filter(
+                User.telegram_id == telegram_id
+            ).update({User.notifications_enabled: False})
+
+    def get_user_status(self, telegram_id: int, session=None) -> dict:
+        """Get a user's status summary in one aggregated query
+
+        Returns subscription fields plus the active-search count and the
+        most recent last_check across the user's alerts, or None when the
+        user is unknown. One query instead of a user lookup followed by a
+        per-alert scan.
+        """
+        with self.session_scope(session) as s:
+            row = s.query(
+                User.subscription_type,
+                User.subscription_expires,
+                User.notifications_enabled,
+                func.count(case((SearchAlert.is_active == True, SearchAlert.id))),
+                func.max(SearchAlert.last_check),
+            ).outerjoin(
+                SearchAlert, SearchAlert.user_id == User.id
+            ).filter(
+                User.telegram_id == telegram_id
+            ).group_by(User.id).first()
+
+            if row is None:
+                return None
+            return {
+                'subscription_type': row[0],
+                'subscription_expires': row[1],
+                'notifications_enabled': row[2],
+                'active_searches': row[3],
+                'last_check': row[4],
+            }
+
+    def touch_last_check(self, search_alert_id: int, session=None):
+        """Update the last_check timestamp for a search alert"""
+        with self.session_scope(session) as s:
+            s.query(SearchAlert).filter(
+                SearchAlert.id == search_alert_id
+            ).update({SearchAlert.last_check: datetime.utcnow()})
 
 # Create global database manager instance
 db_manager = DatabaseManager()
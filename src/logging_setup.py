@@ -0,0 +1,70 @@
+"""
+Non-blocking logging setup shared by the application entry points
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_configured = False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log aggregators
+
+    Only built-in fields are emitted; the message is rendered lazily via
+    record.getMessage() so %-style args keep their cheap-skip behavior
+    for filtered levels.
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_queue_logging(level=logging.INFO):
+    """Route all logging through a queue drained by a background thread
+
+    File/stream writes then never block the asyncio event loop. Safe to
+    call more than once; only the first call installs the listener.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    log_queue = queue.SimpleQueue()
+    # LOG_FORMAT=json switches the listener's handlers to structured
+    # one-object-per-line output for production log shipping
+    if os.getenv('LOG_FORMAT', 'text') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+    file_handler = logging.FileHandler('car_scout.log')
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    listener = QueueListener(log_queue, file_handler, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # The queue handler only merges arguments into the message; the
+    # listener's handlers apply the real format
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
+    # force=True replaces any handlers installed by earlier imports, so the
+    # file handler sees records no matter which module configured first
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
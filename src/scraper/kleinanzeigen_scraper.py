@@ -3,20 +3,215 @@ Web scraper for Kleinanzeigen.de car listings
 Respects robots.txt and implements proper delays
 """
 
-import time
+import asyncio
+import hashlib
 import logging
-import requests
-from bs4 import BeautifulSoup
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import httpx
+import lxml.html
+
+# Advertise brotli only when a decoder is importable; httpx raises on a
+# br response it cannot decode. Kleinanzeigen serves br, which is
+# noticeably smaller than gzip for listing pages.
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    _ACCEPT_ENCODING = 'gzip, deflate'
+from lxml import etree
 from urllib.parse import urljoin, urlparse, parse_qs
 from dataclasses import dataclass
+from datetime import datetime
 from typing import List, Optional
 import re
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+_BASE_URL = "https://www.kleinanzeigen.de"
+
+# Transient statuses worth retrying before giving up on a page
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Extraction patterns compiled once at import; they run against every
+# parsed article, so per-call re.compile lookups add up. The previous
+# inline literals had doubled backslashes (r'\\d' matches a literal
+# backslash followed by "d"), so price/mileage/year extraction never
+# matched anything — fixed while hoisting.
+# "12.500" (dotted thousands) or a plain run of digits
+_PRICE_RE = re.compile(r'(\d+(?:\.\d{3})*)')
+_MILEAGE_RES = [
+    # "120.000 km", "120k km", "120000km"; the dotted form requires at
+    # least one thousands group and a word boundary so a plain "85000km"
+    # falls through to the last pattern instead of matching "000km"
+    re.compile(r'\b(\d{1,3}(?:\.\d{3})+)\s*km', re.IGNORECASE),
+    re.compile(r'\b(\d{1,3})k\s*km', re.IGNORECASE),
+    re.compile(r'\b(\d{1,6})\s*km', re.IGNORECASE),
+]
+_YEAR_RE = re.compile(r'\b(19[8-9]\d|20[0-2]\d)\b')
+# One alternation scan instead of seven Python substring checks
+_FUEL_RE = re.compile(
+    r'\b(benzin|diesel|elektro|hybrid|lpg|cng|erdgas)\b', re.IGNORECASE
+)
+
+# Compiled XPath expressions; each one replaces a BeautifulSoup find()
+# tree walk per article with a single pass in lxml's C engine
+_ARTICLES_XP = etree.XPath("//article[contains(@class, 'aditem')]")
+_TITLE_LINK_XP = etree.XPath(".//h2[contains(@class, 'text-module-begin')]//a")
+_PRICE_XP = etree.XPath(
+    ".//p[contains(@class, 'aditem-main--middle--price-shipping--price')]"
+)
+_LOCATION_XP = etree.XPath(".//div[contains(@class, 'aditem-main--top--left')]")
+_DATE_XP = etree.XPath(".//div[contains(@class, 'aditem-main--top--right')]")
+_DESC_XP = etree.XPath(".//p[contains(@class, 'aditem-main--middle--description')]")
+_IMG_XP = etree.XPath(".//img")
+# Detail-page expressions (cold path, compiled for consistency)
+_DETAIL_DESC_XP = etree.XPath("//p[@id='viewad-description-text']")
+_DETAIL_SELLER_XP = etree.XPath(
+    "//div[@id='viewad-contact']//span[contains(@class, 'iconlist-text')]"
+)
+_DETAIL_IMAGES_XP = etree.XPath("//img[contains(@class, 'galleryimage-element')]")
+
+
+def _first_text(nodes) -> str:
+    """Stripped text content of the first node in an XPath result, or ''"""
+    return nodes[0].text_content().strip() if nodes else ''
+
+
+def _extract_mileage(text: str) -> Optional[str]:
+    """Extract mileage from text"""
+    for pattern in _MILEAGE_RES:
+        match = pattern.search(text)
+        if match:
+            return match.group(0)
+    return None
+
+
+def _extract_year(text: str) -> Optional[str]:
+    """Extract year from text"""
+    # 4-digit years from 1980 to current year + 1
+    match = _YEAR_RE.search(text)
+    if match:
+        year = int(match.group(1))
+        if 1980 <= year <= datetime.now().year + 1:
+            return str(year)
+    return None
+
+
+def _extract_fuel_type(text: str) -> Optional[str]:
+    """Extract fuel type from text"""
+    match = _FUEL_RE.search(text)
+    if match:
+        return match.group(1).capitalize()
+    return None
+
+
+def _parse_listing(article) -> Optional['CarListing']:
+    """
+    Parse a single listing from HTML element
+
+    Args:
+        article: lxml article element
+
+    Returns:
+        CarListing object or None if parsing fails
+    """
+    try:
+        # Get listing ID
+        listing_id = article.get('data-adid', '')
+
+        # Get title and URL
+        title_links = _TITLE_LINK_XP(article)
+        if not title_links:
+            return None
+
+        title_link = title_links[0]
+        title = title_link.text_content().strip()
+        relative_url = title_link.get('href', '')
+        full_url = urljoin(_BASE_URL, relative_url)
+
+        # Get price
+        price_text = _first_text(_PRICE_XP(article))
+        price = 0
+        if price_text:
+            # Extract numeric price; thousands dots are dropped after
+            # the match, not before, so the dotted pattern can see them
+            price_match = _PRICE_RE.search(price_text)
+            if price_match:
+                price = int(price_match.group(1).replace('.', ''))
+
+        # Get location
+        location_text = _first_text(_LOCATION_XP(article))
+        location = "Unknown"
+        if location_text:
+            # Location is typically after the date
+            location_parts = location_text.split('\n')
+            if len(location_parts) > 1:
+                location = location_parts[-1].strip()
+
+        # Get date
+        date = _first_text(_DATE_XP(article)) or "Unknown"
+
+        # Get description (if available in listing preview)
+        description = _first_text(_DESC_XP(article))
+
+        # Get image URL
+        image_elements = _IMG_XP(article)
+        image_url = None
+        if image_elements:
+            image_element = image_elements[0]
+            image_url = image_element.get('src') or image_element.get('data-src')
+            if image_url and not image_url.startswith('http'):
+                image_url = urljoin(_BASE_URL, image_url)
+
+        # Parse additional details from title/description; build the
+        # combined string once for all three extractors
+        combined = f"{title} {description}"
+        mileage = _extract_mileage(combined)
+        year = _extract_year(combined)
+        fuel_type = _extract_fuel_type(combined)
+
+        return CarListing(
+            id=listing_id,
+            title=title,
+            price=price,
+            location=location,
+            date=date,
+            description=description,
+            url=full_url,
+            image_url=image_url,
+            mileage=mileage,
+            year=year,
+            fuel_type=fuel_type
+        )
+
+    except Exception as e:
+        logger.error(f"Error parsing listing: {e}")
+        return None
+
+
+def _parse_page_bytes(html: bytes) -> List['CarListing']:
+    """Parse one results page into CarListing objects
+
+    Top-level and operating on raw bytes so it is picklable into a
+    process-pool worker; the returned dataclasses hold only plain
+    values, never lxml nodes.
+    """
+    doc = lxml.html.fromstring(html)
+    return [
+        listing
+        for listing in map(_parse_listing, _ARTICLES_XP(doc))
+        if listing is not None
+    ]
+
+@dataclass(slots=True, frozen=True)
 class CarListing:
-    """Data class for car listing information"""
+    """Data class for car listing information
+
+    Hundreds of these exist per scraped page; slots drops the per-instance
+    __dict__ and frozen makes them hashable for set-based dedup.
+    """
     id: str
     title: str
     price: int
@@ -32,7 +227,7 @@ class CarListing:
 class KleinanzeigenScraper:
     """Scraper for Kleinanzeigen.de car listings"""
     
-    BASE_URL = "https://www.kleinanzeigen.de"
+    BASE_URL = _BASE_URL
     CARS_SECTION = "/s-autos/c216"
     
     def __init__(self, delay_seconds: int = 3):
@@ -40,19 +235,95 @@ class KleinanzeigenScraper:
         Initialize the scraper
         
         Args:
-            delay_seconds: Delay between requests to be respectful
+            delay_seconds: Minimum gap between any two requests, shared
+                across all concurrent scrape tasks
         """
         self.delay = delay_seconds
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'de-DE,de;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        })
+        # One async client for the whole scraper: connections to
+        # kleinanzeigen.de stay alive across page fetches and HTTP/2
+        # multiplexes concurrent requests over them instead of paying a
+        # TCP+TLS handshake each. Transport retries cover transient
+        # connect failures.
+        self.client = httpx.AsyncClient(
+            http2=True,
+            transport=httpx.AsyncHTTPTransport(retries=3),
+            limits=httpx.Limits(
+                max_connections=32,
+                max_keepalive_connections=8,
+                keepalive_expiry=60.0,
+            ),
+            timeout=30.0,
+            follow_redirects=True,
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                'Accept-Language': 'de-DE,de;q=0.8,en-US;q=0.5,en;q=0.3',
+                'Accept-Encoding': _ACCEPT_ENCODING,
+            },
+        )
+        # Pacing state for the respectful-delay gap; a lock-protected
+        # "next allowed fetch" timestamp acts as a token bucket shared by
+        # every concurrent task, so concurrency never multiplies our
+        # request rate against the site
+        self._next_fetch_at = 0.0
+        self._pace_lock = asyncio.Lock()
+        # Per-URL validators from the last fetch: (etag, last_modified,
+        # body_hash). Re-polls send If-None-Match/If-Modified-Since so an
+        # unchanged page costs a 304 with no body; for servers that send
+        # no validators, a blake2b digest of the body catches identical
+        # HTML before it reaches the parser.
+        self._page_cache = {}
+        # lxml parsing is CPU-bound Python-visible work; a small process
+        # pool lets pages from concurrent search URLs parse in parallel
+        # instead of serializing on the GIL. Workers start lazily on the
+        # first submit.
+        self._parse_pool = ProcessPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1)
+        )
+
+    async def aclose(self):
+        """Close the underlying HTTP client and the parse pool"""
+        await self.client.aclose()
+        self._parse_pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _fetch(self, url: str, headers: dict = None) -> httpx.Response:
+        """GET a page, honoring the global request gap
+
+        Transient statuses (429 and common 5xx) are retried with
+        exponential backoff — or the server's Retry-After when it sends
+        one — so a single hiccup doesn't abort a multi-page scrape.
+        Connect-level failures are already retried by the transport.
+        A 304 (conditional request hit) is returned as-is.
+        """
+        for attempt in range(3):
+            async with self._pace_lock:
+                now = asyncio.get_running_loop().time()
+                wait = self._next_fetch_at - now
+                self._next_fetch_at = max(now, self._next_fetch_at) + self.delay
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            response = await self.client.get(url, headers=headers)
+            if response.status_code == 304:
+                return response
+            if response.status_code in _RETRY_STATUSES and attempt < 2:
+                retry_after = response.headers.get('Retry-After', '')
+                backoff = (
+                    float(retry_after) if retry_after.isdigit()
+                    else 0.5 * (2 ** attempt)
+                )
+                logger.warning(
+                    "Got %d for %s, retrying in %.1fs",
+                    response.status_code, url, backoff,
+                )
+                await asyncio.sleep(backoff)
+                continue
+
+            response.raise_for_status()
+            return response
     
-    def build_search_url(self, 
+    @lru_cache(maxsize=1024)
+    def build_search_url(self,
                         brand: Optional[str] = None,
                         min_price: Optional[int] = None,
                         max_price: Optional[int] = None,
@@ -62,7 +333,10 @@ class KleinanzeigenScraper:
                         max_mileage: Optional[int] = None) -> str:
         """
         Build search URL with filters
-        
+
+        Results are cached: stable alerts call this with the same parameters
+        every cycle, so the URL assembly only runs on the first call.
+
         Args:
             brand: Car brand (e.g., 'bmw', 'audi', 'volkswagen')
             min_price: Minimum price in EUR
@@ -123,7 +397,7 @@ class KleinanzeigenScraper:
             
         return url
     
-    def scrape_listings(self, search_url: str, max_pages: int = 3) -> List[CarListing]:
+    async def scrape_listings(self, search_url: str, max_pages: int = 3) -> List[CarListing]:
         """
         Scrape car listings from search results
         
@@ -142,29 +416,54 @@ class KleinanzeigenScraper:
             page_url = f"{search_url}&pageNum={page}" if page > 1 else search_url
             
             try:
-                # Respectful delay
-                time.sleep(self.delay)
-                
-                response = self.session.get(page_url, timeout=30)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Find listing containers
-                article_elements = soup.find_all('article', class_='aditem')
-                
-                if not article_elements:
+                # Conditional request when we hold validators for this URL
+                cached = self._page_cache.get(page_url)
+                cond_headers = {}
+                if cached:
+                    etag, last_modified, _ = cached
+                    if etag:
+                        cond_headers['If-None-Match'] = etag
+                    if last_modified:
+                        cond_headers['If-Modified-Since'] = last_modified
+
+                # _fetch enforces the respectful delay and awaits instead
+                # of blocking, so other search URLs overlap their waits
+                response = await self._fetch(page_url, headers=cond_headers or None)
+
+                if response.status_code == 304:
+                    # Results are date-sorted, so an unchanged page means
+                    # nothing new on this one or any later page
+                    logger.info(f"Page {page} unchanged (304), skipping parse")
+                    break
+
+                body_hash = hashlib.blake2b(
+                    response.content, digest_size=16
+                ).digest()
+                if cached and cached[2] == body_hash:
+                    logger.info(f"Page {page} body unchanged, skipping parse")
+                    break
+
+                self._page_cache[page_url] = (
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    body_hash,
+                )
+
+                # Hand the raw bytes to the process pool; the event loop
+                # keeps fetching/serving while the page parses
+                page_listings = await asyncio.get_running_loop().run_in_executor(
+                    self._parse_pool, _parse_page_bytes, response.content
+                )
+
+                if not page_listings:
                     logger.info(f"No more listings found on page {page}")
                     break
+
+                listings.extend(page_listings)
+
+                logger.info(f"Found {len(page_listings)} listings on page {page}")
                 
-                for article in article_elements:
-                    listing = self._parse_listing(article)
-                    if listing:
-                        listings.append(listing)
-                
-                logger.info(f"Found {len(article_elements)} listings on page {page}")
-                
-            except requests.RequestException as e:
+            except httpx.HTTPError as e:
                 logger.error(f"Error scraping page {page}: {e}")
                 break
             except Exception as e:
@@ -174,138 +473,7 @@ class KleinanzeigenScraper:
         logger.info(f"Total listings scraped: {len(listings)}")
         return listings
     
-    def _parse_listing(self, article) -> Optional[CarListing]:
-        """
-        Parse a single listing from HTML element
-        
-        Args:
-            article: BeautifulSoup article element
-            
-        Returns:
-            CarListing object or None if parsing fails
-        """
-        try:
-            # Get listing ID
-            listing_id = article.get('data-adid', '')
-            
-            # Get title and URL
-            title_element = article.find('h2', class_='text-module-begin')
-            if not title_element:
-                return None
-                
-            title_link = title_element.find('a')
-            if not title_link:
-                return None
-                
-            title = title_link.get_text(strip=True)
-            relative_url = title_link.get('href', '')
-            full_url = urljoin(self.BASE_URL, relative_url)
-            
-            # Get price
-            price_element = article.find('p', class_='aditem-main--middle--price-shipping--price')
-            price = 0
-            if price_element:
-                price_text = price_element.get_text(strip=True)
-                # Extract numeric price
-                price_match = re.search(r'(\\d{1,3}(?:\\.\\d{3})*)', price_text.replace('.', ''))
-                if price_match:
-                    price = int(price_match.group(1).replace('.', ''))
-            
-            # Get location
-            location_element = article.find('div', class_='aditem-main--top--left')
-            location = "Unknown"
-            if location_element:
-                location_text = location_element.get_text(strip=True)
-                # Location is typically after the date
-                location_parts = location_text.split('\\n')
-                if len(location_parts) > 1:
-                    location = location_parts[-1].strip()
-            
-            # Get date
-            date_element = article.find('div', class_='aditem-main--top--right')
-            date = "Unknown"
-            if date_element:
-                date = date_element.get_text(strip=True)
-            
-            # Get description (if available in listing preview)
-            description_element = article.find('p', class_='aditem-main--middle--description')
-            description = ""
-            if description_element:
-                description = description_element.get_text(strip=True)
-            
-            # Get image URL
-            image_element = article.find('img')
-            image_url = None
-            if image_element:
-                image_url = image_element.get('src') or image_element.get('data-src')
-                if image_url and not image_url.startswith('http'):
-                    image_url = urljoin(self.BASE_URL, image_url)
-            
-            # Parse additional details from title/description
-            mileage = self._extract_mileage(title + " " + description)
-            year = self._extract_year(title + " " + description)
-            fuel_type = self._extract_fuel_type(title + " " + description)
-            
-            return CarListing(
-                id=listing_id,
-                title=title,
-                price=price,
-                location=location,
-                date=date,
-                description=description,
-                url=full_url,
-                image_url=image_url,
-                mileage=mileage,
-                year=year,
-                fuel_type=fuel_type
-            )
-            
-        except Exception as e:
-            logger.error(f"Error parsing listing: {e}")
-            return None
-    
-    def _extract_mileage(self, text: str) -> Optional[str]:
-        """Extract mileage from text"""
-        # Look for patterns like "120.000 km", "120000km", "120k km"
-        patterns = [
-            r'(\\d{1,3}(?:\\.\\d{3})*)\\s*km',
-            r'(\\d{1,3})k\\s*km',
-            r'(\\d{3,6})\\s*km'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(0)
-        return None
-    
-    def _extract_year(self, text: str) -> Optional[str]:
-        """Extract year from text"""
-        # Look for 4-digit years from 1980 to current year + 1
-        import datetime
-        current_year = datetime.datetime.now().year
-        pattern = r'\\b(19[8-9]\\d|20[0-2]\\d)\\b'
-        
-        match = re.search(pattern, text)
-        if match:
-            year = int(match.group(1))
-            if 1980 <= year <= current_year + 1:
-                return str(year)
-        return None
-    
-    def _extract_fuel_type(self, text: str) -> Optional[str]:
-        """Extract fuel type from text"""
-        fuel_types = [
-            'benzin', 'diesel', 'elektro', 'hybrid', 'lpg', 'cng', 'erdgas'
-        ]
-        
-        text_lower = text.lower()
-        for fuel_type in fuel_types:
-            if fuel_type in text_lower:
-                return fuel_type.capitalize()
-        return None
-    
-    def get_detailed_listing(self, listing_url: str) -> Optional[dict]:
+    async def get_detailed_listing(self, listing_url: str) -> Optional[dict]:
         """
         Get detailed information from a specific listing page
         
@@ -316,29 +484,24 @@ class KleinanzeigenScraper:
             Dictionary with detailed listing information
         """
         try:
-            time.sleep(self.delay)
-            
-            response = self.session.get(listing_url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
+            response = await self._fetch(listing_url)
+
+            doc = lxml.html.fromstring(response.content)
+
             details = {}
-            
+
             # Get full description
-            description_element = soup.find('p', id='viewad-description-text')
-            if description_element:
-                details['full_description'] = description_element.get_text(strip=True)
-            
+            full_description = _first_text(_DETAIL_DESC_XP(doc))
+            if full_description:
+                details['full_description'] = full_description
+
             # Get seller information
-            seller_element = soup.find('div', id='viewad-contact')
-            if seller_element:
-                seller_name = seller_element.find('span', class_='iconlist-text')
-                if seller_name:
-                    details['seller_name'] = seller_name.get_text(strip=True)
-            
+            seller_name = _first_text(_DETAIL_SELLER_XP(doc))
+            if seller_name:
+                details['seller_name'] = seller_name
+
             # Get additional images
-            image_elements = soup.find_all('img', class_='galleryimage-element')
+            image_elements = _DETAIL_IMAGES_XP(doc)
             if image_elements:
                 details['image_urls'] = [
                     urljoin(self.BASE_URL, img.get('src', ''))
@@ -351,7 +514,7 @@ class KleinanzeigenScraper:
             logger.error(f"Error getting detailed listing from {listing_url}: {e}")
             return None
 
-def main():
+async def main():
     """Test the scraper"""
     scraper = KleinanzeigenScraper(delay_seconds=2)
     
@@ -365,7 +528,8 @@ def main():
     
     print(f"Search URL: {search_url}")
     
-    listings = scraper.scrape_listings(search_url, max_pages=1)
+    listings = await scraper.scrape_listings(search_url, max_pages=1)
+    await scraper.aclose()
     
     print(f"\\nFound {len(listings)} listings:")
     for i, listing in enumerate(listings[:5], 1):  # Show first 5
@@ -380,4 +544,4 @@ def main():
             print(f"   Year: {listing.year}")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
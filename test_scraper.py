@@ -7,9 +7,11 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+import asyncio
+
 from src.scraper.kleinanzeigen_scraper import KleinanzeigenScraper
 
-def test_scraper():
+async def test_scraper():
     """Test the scraper functionality"""
     print("🔍 Testing Kleinanzeigen.de scraper...")
     
@@ -54,7 +56,7 @@ def test_scraper():
         
         # Scrape listings
         try:
-            listings = scraper.scrape_listings(search_url, max_pages=1)
+            listings = await scraper.scrape_listings(search_url, max_pages=1)
             print(f"✅ Found {len(listings)} listings")
             
             # Show first few listings
@@ -72,10 +74,12 @@ def test_scraper():
         except Exception as e:
             print(f"❌ Error: {e}")
 
+    await scraper.aclose()
+
 def main():
     """Main test function"""
     try:
-        test_scraper()
+        asyncio.run(test_scraper())
         print("\n✅ Scraper test completed successfully!")
     except KeyboardInterrupt:
         print("\n⚠️ Test interrupted by user")